@@ -0,0 +1,36 @@
+import hashlib
+from typing import Optional
+import orjson
+from fastapi import Request, Response
+
+# Clients may reuse a list for 30 s, then must revalidate with If-None-Match
+CACHE_CONTROL = "max-age=30, must-revalidate"
+
+
+def compute_etag(data) -> str:
+    """Weak ETag derived from the content of a result set.
+
+    Weak because GZipMiddleware may send the same data gzip- or
+    identity-encoded, and a strong validator must differ per coding.
+    """
+    return f'W/"{hashlib.blake2b(orjson.dumps(data), digest_size=8).hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison, as If-None-Match requires
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set the validator headers; return a 304 if the client's copy is current."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
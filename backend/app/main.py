@@ -1,9 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import teams, organization, blog, contact
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from app.routers import teams, organization, blog, contact, dashboard
+from app.supabase_client import create_pgrst_client
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.pgrst = create_pgrst_client()
+    try:
+        yield
+    finally:
+        await app.state.pgrst.aclose()
+        await contact.close_email_service()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+# Level 1 still shrinks repetitive JSON a lot at little CPU cost
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
 
 app.include_router(teams.router)
 app.include_router(organization.router)
 app.include_router(blog.router)
 app.include_router(contact.router)
+app.include_router(dashboard.router)
@@ -1,29 +1,71 @@
-from fastapi import APIRouter
-from app.supabase_client import supabase
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, Request, Response
+import httpx
+from cachetools import TTLCache
+from app.etag import compute_etag, not_modified
+from app.schemas import BatchRequest, BlogOut
+from app.supabase_client import get_pgrst, in_filter, postgrest_data, RETURN_REPRESENTATION, SINGLE_OBJECT
 
 router = APIRouter()
 
-@router.post("/blogs/")
-def create_blog(blog: dict):
-    result = supabase.table("Blog").insert(blog).execute()
-    return result.data
+# Columns returned by the list endpoint; fetch a single row for the rest
+BLOG_LIST_COLS = "id,title,author,created_at"
 
-@router.get("/blogs/")
-def get_blogs():
-    result = supabase.table("Blog").select("*").execute()
-    return result.data
+# Recent reads of the Blog table; cleared on every write to it
+_cache = TTLCache(maxsize=512, ttl=60)
 
-@router.get("/blogs/{blog_id}")
-def get_blog(blog_id: str):
-    result = supabase.table("Blog").select("*").eq("id", blog_id).single().execute()
-    return result.data
+@router.post("/blogs/", response_model=List[BlogOut], response_model_exclude_unset=True)
+async def create_blog(blog: dict, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.post("/Blog", json=blog, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return data
 
-@router.put("/blogs/{blog_id}")
-def update_blog(blog_id: str, blog: dict):
-    result = supabase.table("Blog").update(blog).eq("id", blog_id).execute()
-    return result.data
+async def list_blogs(client: httpx.AsyncClient) -> Tuple[list, str]:
+    """Return the list-view rows and their ETag, from the cache while fresh."""
+    cached = _cache.get(("list",))
+    if cached is None:
+        r = await client.get("/Blog", params={"select": BLOG_LIST_COLS})
+        data = postgrest_data(r)
+        cached = _cache[("list",)] = (data, compute_etag(data))
+    return cached
+
+@router.get("/blogs/", response_model=List[BlogOut], response_model_exclude_unset=True)
+async def get_blogs(request: Request, response: Response, client: httpx.AsyncClient = Depends(get_pgrst)):
+    data, etag = await list_blogs(client)
+    unchanged = not_modified(request, response, etag)
+    if unchanged is not None:
+        return unchanged
+    return data
+
+@router.post("/blogs/batch", response_model=Dict[str, Optional[BlogOut]], response_model_exclude_unset=True)
+async def get_blogs_batch(batch: BatchRequest, client: httpx.AsyncClient = Depends(get_pgrst)):
+    """Fetch several rows in one roundtrip, keyed by id in request order (null when missing)."""
+    if not batch.ids:
+        return {}
+    unique_ids = list(dict.fromkeys(batch.ids))
+    r = await client.get("/Blog", params={"select": "*", "id": in_filter(unique_ids)})
+    rows = {str(row["id"]): row for row in postgrest_data(r)}
+    return {i: rows.get(i) for i in batch.ids}
+
+@router.get("/blogs/{blog_id}", response_model=BlogOut, response_model_exclude_unset=True)
+async def get_blog(blog_id: str, client: httpx.AsyncClient = Depends(get_pgrst)):
+    data = _cache.get(("item", blog_id))
+    if data is None:
+        r = await client.get("/Blog", params={"select": "*", "id": f"eq.{blog_id}"}, headers=SINGLE_OBJECT)
+        data = _cache[("item", blog_id)] = postgrest_data(r, single=True)
+    return data
+
+@router.put("/blogs/{blog_id}", response_model=List[BlogOut], response_model_exclude_unset=True)
+async def update_blog(blog_id: str, blog: dict, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.patch("/Blog", params={"id": f"eq.{blog_id}"}, json=blog, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return data
 
 @router.delete("/blogs/{blog_id}")
-def delete_blog(blog_id: str):
-    result = supabase.table("Blog").delete().eq("id", blog_id).execute()
-    return {"deleted": result.data}
+async def delete_blog(blog_id: str, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.delete("/Blog", params={"id": f"eq.{blog_id}"}, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return {"deleted": data}
@@ -1,11 +1,40 @@
-from fastapi import APIRouter, Form, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Form
+import logging
 import os
+from dotenv import load_dotenv
 from app.services.email import EmailConfig, EmailService
 
+# CFG below reads the environment at import; don't depend on import order for .env
+load_dotenv()
+
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Resolved once at import; a missing recipient fails startup, not each request
+CFG = EmailConfig.from_env()
+SVC = EmailService(CFG)
+RECIPIENT = os.getenv("CONTACT_RECIPIENT") or CFG.default_from or CFG.smtp_user
+if not RECIPIENT:
+    raise RuntimeError("Contact recipient not configured: set CONTACT_RECIPIENT, SMTP_FROM or SMTP_USER")
+
+
+async def close_email_service() -> None:
+    """Close the contact service's SMTP sessions."""
+    SVC.close()
+    await SVC.aclose()
+
+
+async def _send_contact_email(svc: EmailService, **kwargs) -> None:
+    # Runs after the response is sent, so failures can only be logged
+    try:
+        await svc.send_email_async(**kwargs)
+    except Exception:
+        logger.exception("Failed to send contact email")
+
 
-@router.post("/contact/")
-def submit_contact(
+@router.post("/contact/", status_code=202)
+async def submit_contact(
+    background: BackgroundTasks,
     name: str = Form(...),
     email: str = Form(...),
     phone: str = Form(None),
@@ -15,14 +44,8 @@ def submit_contact(
     """Receive contact form submissions from the website and email them to the configured recipient.
 
     Expects application/x-www-form-urlencoded form data (the static `contact.html` form).
+    The email is sent in the background after the 202 response is returned.
     """
-    cfg = EmailConfig.from_env()
-    svc = EmailService(cfg)
-
-    recipient = os.getenv("CONTACT_RECIPIENT") or cfg.default_from or cfg.smtp_user
-    if not recipient:
-        raise HTTPException(status_code=500, detail="Contact recipient not configured")
-
     body_lines = [
         f"Name: {name}",
         f"Email: {email}",
@@ -33,15 +56,15 @@ def submit_contact(
     ]
     body = "\n".join(body_lines)
 
-    try:
-        svc.send_email(
-            to_addresses=[recipient],
-            subject=f"Website contact: {subject}",
-            body=body,
-            from_address=cfg.default_from or recipient,
-            reply_to=email,
-        )
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Failed to send contact email: {e}")
-
-    return {"status": "ok", "message": "Contact message sent"}
+    background.add_task(
+        _send_contact_email,
+        SVC,
+        to_addresses=[RECIPIENT],
+        subject=f"Website contact: {subject}",
+        body=body,
+        from_address=CFG.default_from or RECIPIENT,
+        reply_to=email,
+        cte="quoted-printable",
+    )
+
+    return {"status": "accepted", "message": "Contact message queued"}
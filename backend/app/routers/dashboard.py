@@ -0,0 +1,18 @@
+import asyncio
+from fastapi import APIRouter, Depends
+import httpx
+from app.routers import blog, organization, teams
+from app.schemas import DashboardOut
+from app.supabase_client import get_pgrst
+
+router = APIRouter()
+
+@router.get("/dashboard", response_model=DashboardOut, response_model_exclude_unset=True)
+async def get_dashboard(client: httpx.AsyncClient = Depends(get_pgrst)):
+    """Blogs, organizations and teams in one response; the three reads run concurrently."""
+    (blogs, _), (orgs, _), (team_rows, _) = await asyncio.gather(
+        blog.list_blogs(client),
+        organization.list_organizations(client),
+        teams.list_teams(client),
+    )
+    return {"blogs": blogs, "organizations": orgs, "teams": team_rows}
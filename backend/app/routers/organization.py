@@ -1,29 +1,72 @@
-from fastapi import APIRouter
-from app.supabase_client import supabase
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, Request, Response
+import httpx
+from cachetools import TTLCache
+from app.etag import compute_etag, not_modified
+from app.schemas import BatchRequest, OrganizationOut
+from app.supabase_client import get_pgrst, in_filter, postgrest_data, RETURN_REPRESENTATION, SINGLE_OBJECT
 
 router = APIRouter()
 
-@router.post("/organizations/")
-def create_organization(org: dict):
-    result = supabase.table("Organization").insert(org).execute()
-    return result.data
+# Columns returned by the list endpoint. All of them until the table's
+# schema is confirmed: PostgREST rejects the query if a named column is missing
+ORGANIZATION_LIST_COLS = "*"
 
-@router.get("/organizations/")
-def get_organizations():
-    result = supabase.table("Organization").select("*").execute()
-    return result.data
+# Recent reads of the Organization table; cleared on every write to it
+_cache = TTLCache(maxsize=512, ttl=60)
 
-@router.get("/organizations/{org_id}")
-def get_organization(org_id: str):
-    result = supabase.table("Organization").select("*").eq("id", org_id).single().execute()
-    return result.data
+@router.post("/organizations/", response_model=List[OrganizationOut], response_model_exclude_unset=True)
+async def create_organization(org: dict, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.post("/Organization", json=org, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return data
 
-@router.put("/organizations/{org_id}")
-def update_organization(org_id: str, org: dict):
-    result = supabase.table("Organization").update(org).eq("id", org_id).execute()
-    return result.data
+async def list_organizations(client: httpx.AsyncClient) -> Tuple[list, str]:
+    """Return the list-view rows and their ETag, from the cache while fresh."""
+    cached = _cache.get(("list",))
+    if cached is None:
+        r = await client.get("/Organization", params={"select": ORGANIZATION_LIST_COLS})
+        data = postgrest_data(r)
+        cached = _cache[("list",)] = (data, compute_etag(data))
+    return cached
+
+@router.get("/organizations/", response_model=List[OrganizationOut], response_model_exclude_unset=True)
+async def get_organizations(request: Request, response: Response, client: httpx.AsyncClient = Depends(get_pgrst)):
+    data, etag = await list_organizations(client)
+    unchanged = not_modified(request, response, etag)
+    if unchanged is not None:
+        return unchanged
+    return data
+
+@router.post("/organizations/batch", response_model=Dict[str, Optional[OrganizationOut]], response_model_exclude_unset=True)
+async def get_organizations_batch(batch: BatchRequest, client: httpx.AsyncClient = Depends(get_pgrst)):
+    """Fetch several rows in one roundtrip, keyed by id in request order (null when missing)."""
+    if not batch.ids:
+        return {}
+    unique_ids = list(dict.fromkeys(batch.ids))
+    r = await client.get("/Organization", params={"select": "*", "id": in_filter(unique_ids)})
+    rows = {str(row["id"]): row for row in postgrest_data(r)}
+    return {i: rows.get(i) for i in batch.ids}
+
+@router.get("/organizations/{org_id}", response_model=OrganizationOut, response_model_exclude_unset=True)
+async def get_organization(org_id: str, client: httpx.AsyncClient = Depends(get_pgrst)):
+    data = _cache.get(("item", org_id))
+    if data is None:
+        r = await client.get("/Organization", params={"select": "*", "id": f"eq.{org_id}"}, headers=SINGLE_OBJECT)
+        data = _cache[("item", org_id)] = postgrest_data(r, single=True)
+    return data
+
+@router.put("/organizations/{org_id}", response_model=List[OrganizationOut], response_model_exclude_unset=True)
+async def update_organization(org_id: str, org: dict, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.patch("/Organization", params={"id": f"eq.{org_id}"}, json=org, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return data
 
 @router.delete("/organizations/{org_id}")
-def delete_organization(org_id: str):
-    result = supabase.table("Organization").delete().eq("id", org_id).execute()
-    return {"deleted": result.data}
+async def delete_organization(org_id: str, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.delete("/Organization", params={"id": f"eq.{org_id}"}, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return {"deleted": data}
@@ -1,29 +1,72 @@
-from fastapi import APIRouter
-from app.supabase_client import supabase
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, Request, Response
+import httpx
+from cachetools import TTLCache
+from app.etag import compute_etag, not_modified
+from app.schemas import BatchRequest, TeamOut
+from app.supabase_client import get_pgrst, in_filter, postgrest_data, RETURN_REPRESENTATION, SINGLE_OBJECT
 
 router = APIRouter()
 
-@router.post("/teams/")
-def create_team(team: dict):
-    result = supabase.table("Teams").insert(team).execute()
-    return result.data
+# Columns returned by the list endpoint. All of them until the table's
+# schema is confirmed: PostgREST rejects the query if a named column is missing
+TEAM_LIST_COLS = "*"
 
-@router.get("/teams/")
-def get_teams():
-    result = supabase.table("Teams").select("*").execute()
-    return result.data
+# Recent reads of the Teams table; cleared on every write to it
+_cache = TTLCache(maxsize=512, ttl=60)
 
-@router.get("/teams/{team_id}")
-def get_team(team_id: str):
-    result = supabase.table("Teams").select("*").eq("id", team_id).single().execute()
-    return result.data
+@router.post("/teams/", response_model=List[TeamOut], response_model_exclude_unset=True)
+async def create_team(team: dict, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.post("/Teams", json=team, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return data
 
-@router.put("/teams/{team_id}")
-def update_team(team_id: str, team: dict):
-    result = supabase.table("Teams").update(team).eq("id", team_id).execute()
-    return result.data
+async def list_teams(client: httpx.AsyncClient) -> Tuple[list, str]:
+    """Return the list-view rows and their ETag, from the cache while fresh."""
+    cached = _cache.get(("list",))
+    if cached is None:
+        r = await client.get("/Teams", params={"select": TEAM_LIST_COLS})
+        data = postgrest_data(r)
+        cached = _cache[("list",)] = (data, compute_etag(data))
+    return cached
+
+@router.get("/teams/", response_model=List[TeamOut], response_model_exclude_unset=True)
+async def get_teams(request: Request, response: Response, client: httpx.AsyncClient = Depends(get_pgrst)):
+    data, etag = await list_teams(client)
+    unchanged = not_modified(request, response, etag)
+    if unchanged is not None:
+        return unchanged
+    return data
+
+@router.post("/teams/batch", response_model=Dict[str, Optional[TeamOut]], response_model_exclude_unset=True)
+async def get_teams_batch(batch: BatchRequest, client: httpx.AsyncClient = Depends(get_pgrst)):
+    """Fetch several rows in one roundtrip, keyed by id in request order (null when missing)."""
+    if not batch.ids:
+        return {}
+    unique_ids = list(dict.fromkeys(batch.ids))
+    r = await client.get("/Teams", params={"select": "*", "id": in_filter(unique_ids)})
+    rows = {str(row["id"]): row for row in postgrest_data(r)}
+    return {i: rows.get(i) for i in batch.ids}
+
+@router.get("/teams/{team_id}", response_model=TeamOut, response_model_exclude_unset=True)
+async def get_team(team_id: str, client: httpx.AsyncClient = Depends(get_pgrst)):
+    data = _cache.get(("item", team_id))
+    if data is None:
+        r = await client.get("/Teams", params={"select": "*", "id": f"eq.{team_id}"}, headers=SINGLE_OBJECT)
+        data = _cache[("item", team_id)] = postgrest_data(r, single=True)
+    return data
+
+@router.put("/teams/{team_id}", response_model=List[TeamOut], response_model_exclude_unset=True)
+async def update_team(team_id: str, team: dict, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.patch("/Teams", params={"id": f"eq.{team_id}"}, json=team, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return data
 
 @router.delete("/teams/{team_id}")
-def delete_team(team_id: str):
-    result = supabase.table("Teams").delete().eq("id", team_id).execute()
-    return {"deleted": result.data}
+async def delete_team(team_id: str, client: httpx.AsyncClient = Depends(get_pgrst)):
+    r = await client.delete("/Teams", params={"id": f"eq.{team_id}"}, headers=RETURN_REPRESENTATION)
+    data = postgrest_data(r)
+    _cache.clear()
+    return {"deleted": data}
@@ -0,0 +1,37 @@
+from typing import List, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# Every id ends up in one `id=in.(...)` query string, so keep the URL bounded
+MAX_BATCH_IDS = 100
+
+
+class BatchRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=MAX_BATCH_IDS)
+
+
+class _RowOut(BaseModel):
+    # Columns not declared on a model (e.g. a blog body) are passed through
+    model_config = ConfigDict(from_attributes=True, extra="allow")
+
+    id: Union[int, str]
+    created_at: Optional[str] = None
+
+
+class BlogOut(_RowOut):
+    title: Optional[str] = None
+    author: Optional[str] = None
+
+
+class OrganizationOut(_RowOut):
+    name: Optional[str] = None
+
+
+class TeamOut(_RowOut):
+    name: Optional[str] = None
+
+
+class DashboardOut(BaseModel):
+    blogs: List[BlogOut]
+    organizations: List[OrganizationOut]
+    teams: List[TeamOut]
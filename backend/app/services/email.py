@@ -1,7 +1,9 @@
 """Email send/receive helpers.
 
 Provides a small, dependency-free helper using the Python standard
-library to send emails (SMTP) and receive emails (IMAP/POP3).
+library to send emails (SMTP) and receive emails (IMAP/POP3). If
+aiosmtplib is installed, send_email_async uses it instead of running
+the blocking SMTP client in a thread.
 
 Configuration is read from environment variables or passed in via
 an EmailConfig object.
@@ -10,18 +12,34 @@ This file aims to be lightweight and safe to import in a FastAPI app.
 """
 from __future__ import annotations
 
+import base64
+import heapq
+import logging
 import os
 import ssl
+import threading
 import smtplib
 import imaplib
 import poplib
-import email
 from email.message import EmailMessage
-from email.header import decode_header
+from email import policy
+from email.parser import BytesParser
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 import asyncio
 
+try:
+	import aiosmtplib
+except ImportError:  # optional: send_email_async falls back to a thread
+	aiosmtplib = None
+
+# Shared parser; policy.default decodes RFC 2047 headers on access
+_PARSER = BytesParser(policy=policy.default)
+logger = logging.getLogger(__name__)
+
+# Loading the CA bundle is slow; one client context is safe to share
+_SSL_CTX = ssl.create_default_context()
+
 
 @dataclass
 class EmailConfig:
@@ -58,58 +76,59 @@ class EmailConfig:
 		)
 
 
-def _decode_header_value(value: Optional[bytes]) -> str:
-	if not value:
-		return ""
-	if isinstance(value, bytes):
-		value = value.decode(errors="ignore")
-	parts = decode_header(value)
-	pieces = []
-	for part, encoding in parts:
-		if isinstance(part, bytes):
-			try:
-				pieces.append(part.decode(encoding or "utf-8", errors="ignore"))
-			except Exception:
-				pieces.append(part.decode("utf-8", errors="ignore"))
-		else:
-			pieces.append(part)
-	return "".join(pieces)
-
-
-def _get_message_text(msg: email.message.Message) -> Tuple[str, Optional[str]]:
-	"""Return (plain_text, html) from a message object."""
-	plain = []
-	html = None
-	if msg.is_multipart():
-		for part in msg.walk():
-			ctype = part.get_content_type()
-			disp = part.get("Content-Disposition", None)
-			if disp is not None and disp.strip().startswith("attachment"):
-				# skip attachments here
-				continue
-			try:
-				payload = part.get_payload(decode=True)
-			except Exception:
-				payload = None
-			if payload is None:
-				continue
-			try:
-				text = payload.decode(part.get_content_charset() or "utf-8", errors="ignore")
-			except Exception:
-				text = payload.decode("utf-8", errors="ignore")
-			if ctype == "text/plain":
-				plain.append(text)
-			elif ctype == "text/html":
-				html = text
-	else:
-		payload = msg.get_payload(decode=True)
-		if payload:
-			try:
-				plain.append(payload.decode(msg.get_content_charset() or "utf-8", errors="ignore"))
-			except Exception:
-				plain.append(payload.decode("utf-8", errors="ignore"))
-
-	return ("\n".join(plain).strip(), html)
+def _part_text(part: EmailMessage) -> str:
+	try:
+		return part.get_content()
+	except LookupError:
+		# unknown charset declared on the part
+		return part.get_payload(decode=True).decode("utf-8", errors="ignore")
+
+
+def _get_message_text(msg: EmailMessage) -> Tuple[str, Optional[str]]:
+	"""Return (plain_text, html) from a message parsed with policy.default."""
+	plain_part = msg.get_body(preferencelist=("plain",))
+	html_part = msg.get_body(preferencelist=("html",))
+	plain = _part_text(plain_part) if plain_part is not None else ""
+	html = _part_text(html_part) if html_part is not None else None
+	return (plain.strip(), html)
+
+
+def _session_lost(exc: OSError) -> bool:
+	"""True if an SMTP error means the connection is gone, not just one message refused."""
+	# smtplib.SMTPException subclasses OSError, so check it explicitly
+	return isinstance(exc, smtplib.SMTPServerDisconnected) or not isinstance(exc, smtplib.SMTPException)
+
+
+def _header(msg: EmailMessage, name: str) -> Optional[str]:
+	"""Return a decoded header, or its raw text if policy.default can't parse it."""
+	try:
+		value = msg[name]
+	except Exception:
+		# e.g. a malformed address literal makes the header parser raise
+		for key, raw in msg.raw_items():
+			if key.lower() == name.lower():
+				return str(raw)
+		return None
+	return None if value is None else str(value)
+
+
+def _parse_message(raw: bytes) -> Optional[Dict[str, Any]]:
+	"""Parse a fetched RFC822 message into a result dict, or None if unreadable."""
+	try:
+		msg = _PARSER.parsebytes(raw)
+		plain, html = _get_message_text(msg)
+		return {
+			"subject": _header(msg, "Subject") or "",
+			"from": _header(msg, "From") or "",
+			"to": _header(msg, "To") or "",
+			"date": _header(msg, "Date"),
+			"plain": plain,
+			"html": html,
+			"raw": base64.b64encode(raw).decode("ascii"),
+		}
+	except Exception:
+		logger.warning("Skipping unreadable message", exc_info=True)
+		return None
 
 
 class EmailService:
@@ -118,12 +137,78 @@ class EmailService:
 	Uses only the standard library (smtplib, imaplib, poplib). For
 	production use you may want to swap in a higher-level client or
 	an async SMTP client.
+
+	The SMTP session is opened on the first send and reused for later
+	ones; call close() (or use the service as a context manager) to
+	release it.
 	"""
 
 	def __init__(self, config: EmailConfig):
 		self.config = config
+		self._server: Optional[smtplib.SMTP] = None
+		self._lock = threading.Lock()
+		self._async_server = None
+		self._async_lock = asyncio.Lock()
 
-	def send_email(
+	def __enter__(self) -> "EmailService":
+		return self
+
+	def __exit__(self, *exc_info) -> None:
+		self.close()
+
+	def _connect(self) -> smtplib.SMTP:
+		# choose connection method
+		if self.config.smtp_use_tls:
+			# Start with plain SMTP and upgrade to TLS via STARTTLS
+			server = smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=30)
+			try:
+				server.ehlo()
+				server.starttls(context=_SSL_CTX)
+				server.ehlo()
+				if self.config.smtp_user and self.config.smtp_password:
+					server.login(self.config.smtp_user, self.config.smtp_password)
+			except Exception:
+				server.close()
+				raise
+		else:
+			# No TLS: try SSL first
+			server = smtplib.SMTP_SSL(self.config.smtp_host, self.config.smtp_port, context=_SSL_CTX)
+			try:
+				if self.config.smtp_user and self.config.smtp_password:
+					server.login(self.config.smtp_user, self.config.smtp_password)
+			except Exception:
+				server.close()
+				raise
+		return server
+
+	def _ensure_connection(self) -> smtplib.SMTP:
+		"""Return the open SMTP session, reconnecting if the server dropped it."""
+		if self._server is not None:
+			try:
+				code, _ = self._server.noop()
+				if code == 250:
+					return self._server
+			except (smtplib.SMTPServerDisconnected, OSError):
+				pass
+			self._drop_connection()
+		self._server = self._connect()
+		return self._server
+
+	def _drop_connection(self) -> None:
+		server, self._server = self._server, None
+		if server is None:
+			return
+		try:
+			server.quit()
+		except Exception:
+			server.close()
+
+	def close(self) -> None:
+		"""Close the cached SMTP session, if any."""
+		with self._lock:
+			self._drop_connection()
+
+	def _build_message(
 		self,
 		to_addresses: List[str],
 		subject: str,
@@ -134,11 +219,9 @@ class EmailService:
 		from_address: Optional[str] = None,
 		reply_to: Optional[str] = None,
 		headers: Optional[Dict[str, str]] = None,
-	) -> None:
-		"""Send an email via SMTP (blocking).
-
-		Raises smtplib.SMTPException on failure.
-		"""
+		cte: Optional[str] = None,
+	) -> Tuple[EmailMessage, str, List[str]]:
+		"""Return (message, sender, all recipients) for a send."""
 		if from_address is None:
 			from_address = self.config.default_from or self.config.smtp_user
 		msg = EmailMessage()
@@ -156,49 +239,147 @@ class EmailService:
 
 		all_recipients = list(to_addresses) + (cc or []) + (bcc or [])
 
+		# an explicit cte (e.g. "quoted-printable") skips picking one from the body
 		if html:
-			msg.set_content(body)
+			msg.set_content(body, cte=cte)
 			msg.add_alternative(html, subtype="html")
 		else:
-			msg.set_content(body)
+			msg.set_content(body, cte=cte)
 
-		# choose connection method
-		if self.config.smtp_use_tls:
-			# Start with plain SMTP and upgrade to TLS via STARTTLS
-			server = smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=30)
+		return msg, from_address, all_recipients
+
+	def send_email(
+		self,
+		to_addresses: List[str],
+		subject: str,
+		body: str,
+		html: Optional[str] = None,
+		cc: Optional[List[str]] = None,
+		bcc: Optional[List[str]] = None,
+		from_address: Optional[str] = None,
+		reply_to: Optional[str] = None,
+		headers: Optional[Dict[str, str]] = None,
+		cte: Optional[str] = None,
+	) -> None:
+		"""Send an email via SMTP (blocking).
+
+		Raises smtplib.SMTPException on failure.
+		"""
+		msg, from_address, all_recipients = self._build_message(
+			to_addresses, subject, body, html, cc, bcc, from_address, reply_to, headers, cte
+		)
+
+		with self._lock:
+			server = self._ensure_connection()
 			try:
-				server.ehlo()
-				server.starttls(context=ssl.create_default_context())
-				server.ehlo()
-				if self.config.smtp_user and self.config.smtp_password:
-					server.login(self.config.smtp_user, self.config.smtp_password)
 				server.send_message(msg, from_addr=from_address, to_addrs=all_recipients)
-			finally:
+			except OSError as e:
+				if _session_lost(e):
+					self._drop_connection()
+				raise
+
+	def send_bulk(self, messages: List[EmailMessage]) -> int:
+		"""Send prebuilt messages over a single SMTP session.
+
+		Sender and recipients come from each message's headers. A failed
+		message is skipped; the session is only reopened if the server
+		dropped it. The run is aborted with smtplib.SMTPException once
+		more than a third of the messages have failed. Returns the number
+		of messages sent.
+		"""
+		sent = 0
+		failures = 0
+		with self._lock:
+			for msg in messages:
 				try:
-					server.quit()
-				except Exception:
-					server.close()
-		else:
-			# No TLS: try SSL first
-			server = smtplib.SMTP_SSL(self.config.smtp_host, self.config.smtp_port, context=ssl.create_default_context())
+					self._ensure_connection().send_message(msg)
+					sent += 1
+				except OSError as e:
+					failures += 1
+					# refused sender/recipients or data leave the session usable
+					if _session_lost(e):
+						self._drop_connection()
+				if failures * 3 > len(messages):
+					raise smtplib.SMTPException(
+						f"Aborting bulk send after {failures} of {len(messages)} messages failed"
+					)
+		return sent
+
+	async def _ensure_async_connection(self):
+		"""Return the open aiosmtplib session, reconnecting if it was dropped."""
+		if self._async_server is not None:
 			try:
-				if self.config.smtp_user and self.config.smtp_password:
-					server.login(self.config.smtp_user, self.config.smtp_password)
-				server.send_message(msg, from_addr=from_address, to_addrs=all_recipients)
-			finally:
-				try:
-					server.quit()
-				except Exception:
-					server.close()
+				if self._async_server.is_connected:
+					await self._async_server.noop()
+					return self._async_server
+			except (aiosmtplib.SMTPException, OSError):
+				pass
+			await self._drop_async_connection()
+		# like _connect, only AUTH when both user and password are configured
+		has_auth = bool(self.config.smtp_user and self.config.smtp_password)
+		server = aiosmtplib.SMTP(
+			hostname=self.config.smtp_host,
+			port=self.config.smtp_port,
+			username=self.config.smtp_user if has_auth else None,
+			password=self.config.smtp_password if has_auth else None,
+			# same choice as _connect: STARTTLS, otherwise implicit SSL
+			start_tls=self.config.smtp_use_tls,
+			use_tls=not self.config.smtp_use_tls,
+			tls_context=_SSL_CTX,
+			timeout=30,
+		)
+		await server.connect()
+		self._async_server = server
+		return server
+
+	async def _drop_async_connection(self) -> None:
+		server, self._async_server = self._async_server, None
+		if server is None:
+			return
+		try:
+			await server.quit()
+		except Exception:
+			server.close()
 
 	async def send_email_async(self, *args, **kwargs) -> None:
-		"""Async wrapper for send_email using asyncio.to_thread."""
-		return await asyncio.to_thread(self.send_email, *args, **kwargs)
+		"""Send an email without blocking the event loop.
+
+		Takes the same arguments as send_email. Uses a persistent
+		aiosmtplib session when aiosmtplib is installed, otherwise runs
+		send_email via asyncio.to_thread.
+		"""
+		if aiosmtplib is None:
+			return await asyncio.to_thread(self.send_email, *args, **kwargs)
+
+		msg, from_address, all_recipients = self._build_message(*args, **kwargs)
+		async with self._async_lock:
+			server = await self._ensure_async_connection()
+			try:
+				await server.send_message(msg, sender=from_address, recipients=all_recipients)
+			except (aiosmtplib.SMTPServerDisconnected, OSError):
+				await self._drop_async_connection()
+				raise
+
+	async def aclose(self) -> None:
+		"""Close the cached async SMTP session, if any."""
+		async with self._async_lock:
+			await self._drop_async_connection()
 
 	def fetch_unseen_imap(self, folder: str = "INBOX", limit: int = 20, mark_seen: bool = False) -> List[Dict[str, Any]]:
 		"""Fetch unseen messages from IMAP mailbox and return parsed list.
 
 		Each item is a dict with keys: subject, from, to, date, plain, html, raw
+		(the RFC822 source, base64-encoded so results stay JSON-serializable)
+		"""
+		return list(self.iter_unseen_imap(folder, limit, mark_seen))
+
+	def iter_unseen_imap(self, folder: str = "INBOX", limit: int = 20, mark_seen: bool = False) -> Iterator[Dict[str, Any]]:
+		"""Yield unseen IMAP messages one at a time, newest first.
+
+		Items are shaped like fetch_unseen_imap's. Each message is parsed
+		only when it is yielded, and its source is released once yielded,
+		so a streaming consumer holds one parsed message at a time. The
+		connection is closed when the generator is exhausted or closed.
 		"""
 		if not self.config.imap_host:
 			raise ValueError("IMAP host not configured")
@@ -222,37 +403,35 @@ class EmailService:
 			imap.select(folder)
 			status, data = imap.search(None, "UNSEEN")
 			if status != "OK":
-				return []
-			ids = data[0].split()[::-1]  # newest first
-			results: List[Dict[str, Any]] = []
-			for idx in ids[:limit]:
-				typ, msg_data = imap.fetch(idx, "(RFC822)")
-				if typ != "OK":
-					continue
-				raw = msg_data[0][1]
-				msg = email.message_from_bytes(raw)
-				subject = _decode_header_value(msg.get("Subject"))
-				from_ = _decode_header_value(msg.get("From"))
-				to = _decode_header_value(msg.get("To"))
-				date = msg.get("Date")
-				plain, html = _get_message_text(msg)
-				results.append({
-					"subject": subject,
-					"from": from_,
-					"to": to,
-					"date": date,
-					"plain": plain,
-					"html": html,
-					"raw": raw,
-				})
-				if not mark_seen:
-					# remove the \Seen flag if we set it implicitly
-					try:
-						imap.store(idx, "-FLAGS", "\\Seen")
-					except Exception:
-						pass
+				return
+			ids = data[0].split()[::-1][:limit]  # newest first
+			if not ids:
+				return
+			# one FETCH for the whole set instead of a roundtrip per message
+			typ, msg_data = imap.fetch(b",".join(ids), "(RFC822)")
+			if typ != "OK":
+				return
+			# (b"<seq> (RFC822 {size}", raw) tuples, interleaved with b")"
+			# lines, in whatever order the server chooses
+			raw_by_id = {}
+			for item in msg_data:
+				if isinstance(item, tuple):
+					raw_by_id[item[0].split()[0]] = item[1]
+			del msg_data
+			if not mark_seen and raw_by_id:
+				# remove the \Seen flag if we set it implicitly
+				try:
+					imap.store(b",".join(raw_by_id), "-FLAGS", "\\Seen")
+				except Exception:
+					pass
 
-			return results
+			for idx in ids:
+				raw = raw_by_id.pop(idx, None)
+				if raw is None:
+					continue
+				result = _parse_message(raw)
+				if result is not None:
+					yield result
 		finally:
 			try:
 				imap.close()
@@ -286,30 +465,18 @@ class EmailService:
 
 			resp, items, octets = pop.list()
 			# items is list of b'1 1234' entries
-			ids = [int(x.split()[0]) for x in items]
-			ids.sort(reverse=True)
+			# newest (highest-numbered) messages first
+			ids = heapq.nlargest(limit, (int(x.split()[0]) for x in items))
 			results: List[Dict[str, Any]] = []
-			for i in ids[:limit]:
+			for i in ids:
 				try:
 					resp, lines, octets = pop.retr(i)
 					raw = b"\r\n".join(lines)
-					msg = email.message_from_bytes(raw)
-					subject = _decode_header_value(msg.get("Subject"))
-					from_ = _decode_header_value(msg.get("From"))
-					to = _decode_header_value(msg.get("To"))
-					date = msg.get("Date")
-					plain, html = _get_message_text(msg)
-					results.append({
-						"subject": subject,
-						"from": from_,
-						"to": to,
-						"date": date,
-						"plain": plain,
-						"html": html,
-						"raw": raw,
-					})
 				except Exception:
 					continue
+				result = _parse_message(raw)
+				if result is not None:
+					results.append(result)
 			return results
 		finally:
 			try:
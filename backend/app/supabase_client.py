@@ -1,10 +1,68 @@
-from supabase import create_client
 import os
+import httpx
 from dotenv import load_dotenv
+from fastapi import HTTPException, Request
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# PostgREST only returns the affected rows for writes when asked to
+RETURN_REPRESENTATION = {"Prefer": "return=representation"}
+# Equivalent of the client's `.single()`: exactly one row, as an object
+SINGLE_OBJECT = {"Accept": "application/vnd.pgrst.object+json"}
+
+
+def create_pgrst_client() -> httpx.AsyncClient:
+    """Build the shared async client for Supabase's PostgREST endpoint.
+
+    Created once per process in the app lifespan so every request reuses
+    the same keep-alive HTTP/2 connections. The transport retries a
+    failed connect once, so a pooled socket the server already closed
+    doesn't surface as an error.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=1,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    )
+    return httpx.AsyncClient(
+        base_url=f"{SUPABASE_URL}/rest/v1",
+        headers={
+            "apikey": SUPABASE_KEY,
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+        },
+        transport=transport,
+        timeout=10.0,
+    )
+
+
+def get_pgrst(request: Request) -> httpx.AsyncClient:
+    return request.app.state.pgrst
+
+
+def in_filter(values) -> str:
+    """Build a PostgREST `in.(...)` filter, quoting each value."""
+    quoted = []
+    for v in values:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"')
+        quoted.append(f'"{v}"')
+    return f"in.({','.join(quoted)})"
+
+
+def postgrest_data(response: httpx.Response, single: bool = False):
+    """Return the decoded body of a PostgREST response, raising on errors.
+
+    With `single=True` (a SINGLE_OBJECT request), PostgREST's 406 for
+    "no row matched" is reported as a 404.
+    """
+    if response.is_error:
+        try:
+            detail = response.json()
+        except ValueError:
+            detail = response.text
+        if single and response.status_code == 406 and isinstance(detail, dict) and detail.get("code") == "PGRST116":
+            raise HTTPException(status_code=404, detail="Not found")
+        raise HTTPException(status_code=response.status_code, detail=detail)
+    return response.json()